@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 
 class RidesConfig(AppConfig):
-    name = 'rides'
\ No newline at end of file
+    name = 'rides'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,38 @@
+import hashlib
+import uuid
+
+from django.core.cache import cache
+
+_GENERATION_KEY = 'rides:list:generation'
+
+
+def _generation():
+    return cache.get_or_set(_GENERATION_KEY, lambda: uuid.uuid4().hex, None)
+
+
+def ride_list_cache_key(request):
+    """
+    Return the cache key for a ride list response.
+
+    The key covers the absolute URL of the path (scheme and host, since
+    the cached body embeds absolute `next`/`previous` links), the sorted
+    query string (so parameter order does not matter) and the negotiated
+    media type (e.g. `indent=4`), plus the current generation, which is
+    rotated whenever rides, ride events or users change.
+    """
+    query = sorted(
+        (key, value)
+        for key, values in request.query_params.lists()
+        for value in values
+    )
+    raw = (
+        f'{request.build_absolute_uri(request.path)}?{query!r}'
+        f'|{request.accepted_media_type}'
+    )
+    digest = hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+    return f'rides:list:{_generation()}:{digest}'
+
+
+def invalidate_ride_list_cache():
+    """Make every cached ride list response stale."""
+    cache.set(_GENERATION_KEY, uuid.uuid4().hex, None)
@@ -0,0 +1,35 @@
+from django_filters import rest_framework as filters
+from rest_framework.filters import OrderingFilter
+
+from .models import Ride
+
+
+class RideFilter(filters.FilterSet):
+    """
+    Filters for the ride list.
+
+    Declared explicitly so the FilterSet class is built once at import,
+    rather than regenerated from `filterset_fields` on every request.
+    """
+
+    class Meta:
+        model = Ride
+        fields = ['status', 'rider__email']
+
+
+class RideOrderingFilter(OrderingFilter):
+    """
+    `OrderingFilter` that drops `distance` when the queryset has no
+    `distance` annotation, i.e. when no valid `lat`/`lng` were given.
+
+    The list action rejects that case with a 400 up front; other actions
+    (detail, writes) simply ignore the ordering instead of failing.
+    """
+
+    def remove_invalid_fields(self, queryset, fields, view, request):
+        valid = super().remove_invalid_fields(queryset, fields, view, request)
+        return [
+            term for term in valid
+            if term.lstrip('-') != 'distance'
+            or 'distance' in queryset.query.annotations
+        ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-15 17:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rides', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ride',
+            index=models.Index(fields=['status'], name='ride_status_4ce3bb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ride',
+            index=models.Index(fields=['pickup_time'], name='ride_pickup__112ef2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rideevent',
+            index=models.Index(fields=['ride', '-created_at'], name='ride_event_id_ride_e49a39_idx'),
+        ),
+    ]
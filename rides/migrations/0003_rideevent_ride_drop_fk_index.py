@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-15 19:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rides', '0002_ride_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='rideevent',
+            name='ride',
+            field=models.ForeignKey(db_column='id_ride', db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='ride_events', to='rides.ride'),
+        ),
+    ]
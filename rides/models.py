@@ -36,6 +36,12 @@ class Ride(models.Model):
 
     class Meta:
         db_table = 'ride'
+        # ForeignKeys already get their own index; these back the
+        # `status` filter and `pickup_time` ordering on the list endpoint.
+        indexes = [
+            models.Index(fields=['status']),
+            models.Index(fields=['pickup_time']),
+        ]
 
     def __str__(self):
         return f"Ride {self.id_ride} ({self.status})"
@@ -46,12 +52,20 @@ class RideEvent(models.Model):
     ride = models.ForeignKey(
         Ride, related_name='ride_events',
         on_delete=models.CASCADE, db_column='id_ride',
+        # The composite (ride, -created_at) index below leads with this
+        # column, so it serves FK lookups and cascades on its own.
+        db_index=False,
     )
     description = models.CharField(max_length=255)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         db_table = 'ride_event'
+        # Lets the "last 24h" lookup per ride use an index range scan
+        # instead of scanning the (very large) event table.
+        indexes = [
+            models.Index(fields=['ride', '-created_at']),
+        ]
 
     def __str__(self):
         return f"RideEvent {self.id_ride_event}: {self.description}"
\ No newline at end of file
@@ -0,0 +1,37 @@
+import orjson
+from django.utils.http import parse_header_parameters
+from drf_orjson_renderer.renderers import ORJSONRenderer
+
+
+class IndentingORJSONRenderer(ORJSONRenderer):
+    """
+    `ORJSONRenderer` that also honours an `indent` media type parameter
+    (`Accept: application/json; indent=4`), like DRF's `JSONRenderer`.
+
+    orjson only supports two-space indentation, so any positive `indent`
+    pretty-prints with two spaces.
+    """
+
+    def render(self, data, media_type=None, renderer_context=None):
+        renderer_context = renderer_context or {}
+        if data is None or not self.get_indent(media_type, renderer_context):
+            return super().render(data, media_type, renderer_context)
+
+        # Same `default_function` handling as `ORJSONRenderer.render`.
+        if 'default_function' in renderer_context:
+            default = renderer_context['default_function']
+        else:
+            default = self.default
+        return orjson.dumps(
+            data, default=default, option=self.options | orjson.OPT_INDENT_2,
+        )
+
+    def get_indent(self, media_type, renderer_context):
+        # Mirrors `rest_framework.renderers.JSONRenderer.get_indent`.
+        if media_type:
+            params = parse_header_parameters(media_type)[1]
+            try:
+                return max(min(int(params['indent']), 8), 0)
+            except (KeyError, ValueError, TypeError):
+                pass
+        return renderer_context.get('indent', None)
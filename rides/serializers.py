@@ -1,3 +1,4 @@
+from django.utils import timezone
 from rest_framework import serializers
 from .models import Ride, RideEvent, User
 
@@ -11,6 +12,107 @@ class UserSerializer(serializers.ModelSerializer):
         )
 
 
+def iso_datetime(value):
+    """
+    Format an aware datetime exactly like DRF's default `DateTimeField`
+    output (current timezone, ISO 8601, `Z` for UTC) without going through
+    the field machinery.
+    """
+    value = timezone.localtime(value).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+class UserSummaryField(serializers.Field):
+    """
+    Read-only user representation with the same keys as `UserSerializer`,
+    built as a plain dict from the already-joined user instance instead of
+    running a nested serializer.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return {name: getattr(value, name) for name in UserSerializer.Meta.fields}
+
+
+# (output key, value-row key) pairs for each joined user, built once at
+# import time instead of formatting lookup names for every row.
+_USER_VALUE_KEYS = {
+    relation: tuple(
+        (name, f'{relation}__{name}') for name in UserSerializer.Meta.fields
+    )
+    for relation in ('rider', 'driver')
+}
+
+RIDE_VALUE_FIELDS = (
+    'id_ride', 'status',
+    'pickup_latitude', 'pickup_longitude',
+    'dropoff_latitude', 'dropoff_longitude',
+    'pickup_time',
+    *(key for keys in _USER_VALUE_KEYS.values() for _, key in keys),
+)
+
+
+def event_rows_to_representation(rows):
+    """Render RideEvent `.values()` rows like `RideEventSerializer`."""
+    return [
+        {
+            'id_ride_event': event['id_ride_event'],
+            'description': event['description'],
+            'created_at': iso_datetime(event['created_at']),
+        }
+        for event in rows
+    ]
+
+
+def ride_rows_to_representation(rows):
+    """
+    Render `Ride.objects.values(*RIDE_VALUE_FIELDS)` rows, each with a
+    `todays_ride_events` list of event rows attached, in the same shape as
+    `RideSerializer`.
+
+    No Ride/User instances or DRF fields are involved. User dicts are
+    memoized per user since riders and drivers repeat across rides.
+    """
+    users = {}
+
+    def user(row, relation):
+        pk = row[relation + '__id_user']
+        if pk is None:
+            return None
+        data = users.get(pk)
+        if data is None:
+            data = users[pk] = {
+                name: row[key] for name, key in _USER_VALUE_KEYS[relation]
+            }
+        return data
+
+    return [
+        {
+            'id_ride': row['id_ride'],
+            'status': row['status'],
+            'rider': user(row, 'rider'),
+            'driver': user(row, 'driver'),
+            'pickup_latitude': row['pickup_latitude'],
+            'pickup_longitude': row['pickup_longitude'],
+            'dropoff_latitude': row['dropoff_latitude'],
+            'dropoff_longitude': row['dropoff_longitude'],
+            'pickup_time': (
+                iso_datetime(row['pickup_time'])
+                if row['pickup_time'] is not None else None
+            ),
+            'todays_ride_events': event_rows_to_representation(
+                row['todays_ride_events'],
+            ),
+        }
+        for row in rows
+    ]
+
+
 class RideEventSerializer(serializers.ModelSerializer):
     class Meta:
         model = RideEvent
@@ -18,8 +120,8 @@ class RideEventSerializer(serializers.ModelSerializer):
 
 
 class RideSerializer(serializers.ModelSerializer):
-    rider = UserSerializer(read_only=True)
-    driver = UserSerializer(read_only=True)
+    rider = UserSummaryField()
+    driver = UserSummaryField()
     todays_ride_events = serializers.SerializerMethodField()
 
     class Meta:
@@ -33,16 +135,16 @@ class RideSerializer(serializers.ModelSerializer):
 
     def get_todays_ride_events(self, obj):
         """
-        Return only RideEvents from the last 24 hours.
-        Uses prefetched `todays_ride_events` attribute set via Prefetch
-        to avoid extra queries. Falls back to a filtered queryset if
-        the attribute is not present (e.g. detail view).
+        Return only RideEvents from the last 24 hours, newest first.
+        Used outside the list view (e.g. detail view); skips the query when
+        the `has_recent_events` annotation says there is nothing to find.
         """
-        events = getattr(obj, 'todays_ride_events', None)
-        if events is None:
-            threshold = self.context.get('todays_threshold')
-            if threshold is None:
-                return []
-            qs = obj.ride_events.filter(created_at__gte=threshold)
-            return RideEventSerializer(qs, many=True).data
-        return RideEventSerializer(events, many=True).data
\ No newline at end of file
+        threshold = self.context.get('todays_threshold')
+        if threshold is None or not getattr(obj, 'has_recent_events', True):
+            return []
+        rows = obj.ride_events.filter(
+            created_at__gte=threshold,
+        ).order_by('-created_at').values(
+            'id_ride_event', 'description', 'created_at',
+        )
+        return event_rows_to_representation(rows)
@@ -0,0 +1,31 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_ride_list_cache
+from .models import Ride, RideEvent, User
+from .serializers import UserSerializer
+
+# User columns rendered in every list row (as rider/driver).
+_LISTED_USER_FIELDS = frozenset(UserSerializer.Meta.fields)
+
+
+@receiver([post_save, post_delete], sender=Ride)
+# No post_delete for events: any delete receiver stops Django from
+# fast-deleting the (very large) event cascade of a ride, and the ride's own
+# post_delete already covers it.
+@receiver(post_save, sender=RideEvent)
+def invalidate_ride_list(sender, **kwargs):
+    # Rotating before the commit would let a concurrent list request cache
+    # the old rows under the new generation.
+    transaction.on_commit(invalidate_ride_list_cache)
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_ride_list_for_user(sender, update_fields=None, **kwargs):
+    # Rider/driver details are embedded in every list row and the
+    # `rider__email` filter matches on them. Partial saves that touch none
+    # of those columns, e.g. `update_last_login` on every login, are skipped.
+    if update_fields is not None and not _LISTED_USER_FIELDS & update_fields:
+        return
+    transaction.on_commit(invalidate_ride_list_cache)
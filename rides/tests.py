@@ -1,17 +1,30 @@
-from datetime import timedelta
+import base64
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
 
+from django.contrib.auth.models import update_last_login
+from django.core.cache import cache
 from django.test import TestCase
 from django.utils import timezone
 from django.db import connection
 from django.test.utils import CaptureQueriesContext
 
-from rest_framework.test import APIClient
+from rest_framework import serializers
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
 
+from .cache import ride_list_cache_key
 from .models import User, Ride, RideEvent
+from .views import RideCursorPagination, RideViewSet, _todays_threshold
 
 
 class RidesAPITest(TestCase):
     def setUp(self):
+        # Cache invalidation only runs on commit, which never happens inside
+        # a test case, so start each test from an empty cache.
+        cache.clear()
+
         # Create users
         self.admin = User.objects.create_user(
             username='admin', password='pass',
@@ -89,6 +102,50 @@ class RidesAPITest(TestCase):
         self.assertIn('Status changed to pickup', descriptions)
         self.assertNotIn('Some old event', descriptions)
 
+    def test_list_orders_todays_events_newest_first(self):
+        earlier = RideEvent.objects.create(
+            ride=self.ride_near, description='Status changed to en-route',
+        )
+        RideEvent.objects.filter(pk=earlier.pk).update(
+            created_at=timezone.now() - timedelta(hours=1),
+        )
+        resp = self.client.get('/api/rides/')
+        results = self._get_results(resp)
+        found = next(r for r in results if r['id_ride'] == self.ride_near.id_ride)
+        self.assertEqual(
+            [e['description'] for e in found['todays_ride_events']],
+            ['Status changed to pickup', 'Status changed to en-route'],
+        )
+
+    def test_list_event_created_at_matches_drf_format(self):
+        """Event timestamps should render exactly like DRF's DateTimeField."""
+        resp = self.client.get('/api/rides/')
+        results = self._get_results(resp)
+        found = next(r for r in results if r['id_ride'] == self.ride_near.id_ride)
+        event = RideEvent.objects.get(
+            pk=found['todays_ride_events'][0]['id_ride_event'],
+        )
+        self.assertEqual(
+            found['todays_ride_events'][0]['created_at'],
+            serializers.DateTimeField().to_representation(event.created_at),
+        )
+
+    def test_viewset_usable_without_dispatch(self):
+        """Schema generation and similar callers skip `dispatch()`."""
+        view = RideViewSet(request=None, action='list', format_kwarg=None)
+        self.assertIsNone(view.distance_origin)
+        self.assertIn('todays_threshold', view.get_serializer_context())
+        self.assertEqual(view.get_queryset().count(), 2)
+
+    def test_todays_threshold_is_shared_within_a_second(self):
+        tick = int(time.time())
+        threshold = _todays_threshold(tick)
+        self.assertIs(_todays_threshold(tick), threshold)
+        self.assertEqual(
+            threshold,
+            datetime.fromtimestamp(tick, tz=dt_timezone.utc) - timedelta(hours=24),
+        )
+
     def test_list_returns_empty_events_for_old_rides(self):
         """Rides with only old events should have empty todays_ride_events."""
         resp = self.client.get('/api/rides/')
@@ -101,6 +158,30 @@ class RidesAPITest(TestCase):
         self.assertIsNotNone(found)
         self.assertEqual(found.get('todays_ride_events', []), [])
 
+    def test_list_renders_nested_rider_and_driver(self):
+        resp = self.client.get('/api/rides/')
+        results = self._get_results(resp)
+        self.assertTrue(len(results) >= 2)
+        for r in results:
+            self.assertEqual(r['rider']['id_user'], self.rider.id_user)
+            self.assertEqual(r['driver'], {
+                'id_user': self.driver.id_user,
+                'username': 'driver',
+                'first_name': '',
+                'last_name': '',
+                'email': 'driver@example.com',
+                'role': 'user',
+                'phone_number': '',
+            })
+
+    def test_list_item_matches_detail_representation(self):
+        resp = self.client.get('/api/rides/')
+        results = self._get_results(resp)
+        for r in results:
+            detail = self.client.get(f"/api/rides/{r['id_ride']}/")
+            self.assertEqual(detail.status_code, 200)
+            self.assertEqual(r, detail.data)
+
     # ── Filtering ───────────────────────────────────────────────────
 
     def test_filter_by_status(self):
@@ -143,6 +224,29 @@ class RidesAPITest(TestCase):
         resp = self.client.get('/api/rides/?ordering=distance&lat=abc&lng=xyz')
         self.assertEqual(resp.status_code, 400)
 
+    def test_list_uses_cursor_pagination(self):
+        resp = self.client.get('/api/rides/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotIn('count', resp.data)
+        self.assertIsNone(resp.data['next'])
+        self.assertIsNone(resp.data['previous'])
+
+    def test_ordering_by_distance_with_non_finite_lat_lng_returns_400(self):
+        for lat, lng in (('nan', '0'), ('0', 'inf'), ('-inf', 'nan')):
+            with self.subTest(lat=lat, lng=lng):
+                resp = self.client.get(
+                    f'/api/rides/?ordering=distance&lat={lat}&lng={lng}',
+                )
+                self.assertEqual(resp.status_code, 400)
+
+    def test_detail_ignores_distance_ordering_without_lat_lng(self):
+        """Distance validation only applies to the list action."""
+        resp = self.client.get(
+            f'/api/rides/{self.ride_near.id_ride}/?ordering=distance',
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['id_ride'], self.ride_near.id_ride)
+
     # ── Authentication / Permissions ────────────────────────────────
 
     def test_unauthenticated_user_denied(self):
@@ -160,18 +264,231 @@ class RidesAPITest(TestCase):
 
     def test_minimal_number_of_queries_for_list(self):
         """
-        The ride list should be fetchable in at most 3 queries:
-        1. COUNT query for pagination
-        2. SELECT rides with JOIN on rider and driver (select_related)
-        3. SELECT recent ride events (prefetch_related)
+        The ride list should be fetchable in at most 2 queries:
+        1. SELECT rides with JOIN on rider and driver (select_related)
+        2. SELECT recent ride events for the page
         """
         with CaptureQueriesContext(connection) as captured:
             resp = self.client.get('/api/rides/')
             self.assertEqual(resp.status_code, 200)
 
-        # 3 queries: count + rides (with select_related) + prefetch events
+        # 2 queries: rides (with select_related) + recent events;
+        # cursor pagination needs no COUNT query.
         self.assertLessEqual(
-            len(captured), 3,
-            f"Expected at most 3 queries, got {len(captured)}:\n"
+            len(captured), 2,
+            f"Expected at most 2 queries, got {len(captured)}:\n"
             + "\n".join(q['sql'] for q in captured),
-        )
\ No newline at end of file
+        )
+
+    def test_list_skips_event_query_without_recent_events(self):
+        """Pages whose rides have no recent events need only the ride query."""
+        now = timezone.now()
+        RideEvent.objects.filter(created_at__gte=now - timedelta(hours=24)).update(
+            created_at=now - timedelta(days=2),
+        )
+        with CaptureQueriesContext(connection) as captured:
+            resp = self.client.get('/api/rides/')
+            self.assertEqual(resp.status_code, 200)
+
+        self.assertEqual(len(captured), 1)
+        for r in resp.data['results']:
+            self.assertEqual(r['todays_ride_events'], [])
+
+    def test_unpaginated_list_is_fetched_in_chunks(self):
+        """Without pagination, rides and their events are read chunk by chunk."""
+        with mock.patch.object(RideViewSet, 'pagination_class', None), \
+                mock.patch.object(RideViewSet, 'unpaginated_chunk_size', 1):
+            resp = self.client.get('/api/rides/')
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(
+            [r['id_ride'] for r in resp.data],
+            [self.ride_near.id_ride, self.ride_far.id_ride],
+        )
+        found = next(r for r in resp.data if r['id_ride'] == self.ride_near.id_ride)
+        self.assertEqual(
+            [e['description'] for e in found['todays_ride_events']],
+            ['Status changed to pickup'],
+        )
+
+    # ── Caching ─────────────────────────────────────────────────────
+
+    def test_repeated_list_is_served_from_cache(self):
+        first = self.client.get('/api/rides/?status=en-route&ordering=pickup_time')
+        self.assertEqual(first.status_code, 200)
+
+        with CaptureQueriesContext(connection) as captured:
+            second = self.client.get('/api/rides/?ordering=pickup_time&status=en-route')
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(len(captured), 0)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['Content-Type'], first['Content-Type'])
+
+    def test_cached_list_links_follow_request_scheme(self):
+        for _ in range(25):
+            Ride.objects.create(
+                status='pickup', pickup_latitude=1.0, pickup_longitude=1.0,
+            )
+        plain = self.client.get('/api/rides/')
+        secure = self.client.get('/api/rides/', secure=True)
+
+        self.assertTrue(plain.json()['next'].startswith('http://'))
+        self.assertTrue(secure.json()['next'].startswith('https://'))
+
+    def test_list_honours_indent_media_type(self):
+        compact = self.client.get('/api/rides/')
+        indented = self.client.get(
+            '/api/rides/', HTTP_ACCEPT='application/json; indent=4',
+        )
+
+        self.assertNotIn(b'\n', compact.content)
+        self.assertIn(b'\n  "results": [', indented.content)
+        self.assertEqual(indented.json(), compact.json())
+
+    def test_list_cache_key_includes_accepted_media_type(self):
+        def key(media_type):
+            request = Request(APIRequestFactory().get('/api/rides/'))
+            request.accepted_media_type = media_type
+            return ride_list_cache_key(request)
+
+        self.assertEqual(key('application/json'), key('application/json'))
+        self.assertNotEqual(
+            key('application/json'), key('application/json; indent=4'),
+        )
+
+    def test_ride_changes_invalidate_cached_list(self):
+        self.client.get('/api/rides/')
+        self.ride_far.status = 'dropoff'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ride_far.save()
+
+        resp = self.client.get('/api/rides/')
+        self.assertEqual(resp.status_code, 200)
+        found = next(
+            r for r in resp.json()['results']
+            if r['id_ride'] == self.ride_far.id_ride
+        )
+        self.assertEqual(found['status'], 'dropoff')
+
+    def test_cache_invalidation_waits_for_commit(self):
+        def status():
+            resp = self.client.get('/api/rides/')
+            return next(
+                r['status'] for r in resp.json()['results']
+                if r['id_ride'] == self.ride_far.id_ride
+            )
+
+        status()
+        self.ride_far.status = 'dropoff'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ride_far.save()
+            # Not committed yet: the cached list is still served.
+            self.assertEqual(status(), 'pickup')
+        self.assertEqual(status(), 'dropoff')
+
+    def test_ride_delete_invalidates_cached_list(self):
+        self.client.get('/api/rides/')
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.delete(f'/api/rides/{self.ride_far.id_ride}/')
+        self.assertEqual(resp.status_code, 204)
+
+        resp = self.client.get('/api/rides/')
+        self.assertNotIn(
+            self.ride_far.id_ride,
+            [r['id_ride'] for r in resp.json()['results']],
+        )
+
+    def test_ride_delete_fast_deletes_its_events(self):
+        RideEvent.objects.bulk_create(
+            RideEvent(ride=self.ride_near, description=f'Event {i}')
+            for i in range(200)
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            self.ride_near.delete()
+
+        # The events go in a single DELETE, without being loaded first.
+        event_queries = [
+            q['sql'] for q in ctx.captured_queries if 'ride_event' in q['sql']
+        ]
+        self.assertEqual(len(event_queries), 1)
+        self.assertTrue(event_queries[0].startswith('DELETE'))
+        self.assertFalse(RideEvent.objects.filter(ride_id=self.ride_near.pk).exists())
+
+    def _walk_pages(self, url):
+        """Follow `next` links from `url`, then `previous` links back."""
+        forward, pages = [], []
+        while url:
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            data = resp.json()
+            pages.append(data)
+            forward += [r['id_ride'] for r in data['results']]
+            url = data['next']
+        backward = []
+        url = pages[-1]['previous']
+        while url:
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            data = resp.json()
+            backward = [r['id_ride'] for r in data['results']] + backward
+            url = data['previous']
+        backward += [r['id_ride'] for r in pages[-1]['results']]
+        return forward, backward
+
+    def test_cursor_pagination_includes_rides_without_pickup_time(self):
+        now = timezone.now()
+        for i in range(43):
+            Ride.objects.create(
+                status='pickup', rider=self.rider, driver=self.driver,
+                pickup_latitude=1.0, pickup_longitude=1.0,
+                pickup_time=None if i % 2 else now - timedelta(minutes=i),
+            )
+        all_ids = set(Ride.objects.values_list('id_ride', flat=True))
+
+        for ordering in (
+            'pickup_time', '-pickup_time', 'distance&lat=0&lng=0',
+        ):
+            with self.subTest(ordering=ordering):
+                forward, backward = self._walk_pages(
+                    f'/api/rides/?ordering={ordering}',
+                )
+                self.assertEqual(len(forward), len(all_ids))
+                self.assertEqual(set(forward), all_ids)
+                self.assertEqual(backward, forward)
+
+    def test_cursor_position_from_instance_or_values_row(self):
+        paginator = RideCursorPagination()
+        ordering = ('pickup_time', 'id_ride')
+        row = Ride.objects.values('pickup_time', 'id_ride').get(
+            pk=self.ride_near.pk,
+        )
+        self.assertEqual(
+            paginator._get_position_from_instance(self.ride_near, ordering),
+            paginator._get_position_from_instance(row, ordering),
+        )
+
+    def test_invalid_cursor_position_returns_404(self):
+        cursor = base64.b64encode(b'p=None|1').decode()
+        resp = self.client.get(f'/api/rides/?ordering=pickup_time&cursor={cursor}')
+        self.assertEqual(resp.status_code, 404)
+
+    def test_user_changes_invalidate_cached_list(self):
+        self.client.get('/api/rides/?rider__email=rider@example.com')
+        self.rider.email = 'new-rider@example.com'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rider.save()
+
+        old = self.client.get('/api/rides/?rider__email=rider@example.com')
+        self.assertEqual(old.json()['results'], [])
+        new = self.client.get('/api/rides/?rider__email=new-rider@example.com')
+        self.assertEqual(
+            {r['rider']['email'] for r in new.json()['results']},
+            {'new-rider@example.com'},
+        )
+
+    def test_user_login_keeps_cached_list(self):
+        self.client.get('/api/rides/')
+        with self.captureOnCommitCallbacks() as callbacks:
+            update_last_login(None, self.admin)
+        self.assertEqual(callbacks, [])
@@ -1,28 +1,166 @@
-from datetime import timedelta
+import math
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import lru_cache
+from itertools import islice
 
-from django.utils import timezone
-from django.db.models import F, FloatField, ExpressionWrapper, Prefetch
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.functional import cached_property
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections
+from django.db.models import Exists, F, OuterRef, Q
 
-from rest_framework import viewsets, status
+from rest_framework import viewsets
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.permissions import BasePermission
 from rest_framework.response import Response
-from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import CursorPagination
 from django_filters.rest_framework import DjangoFilterBackend
 
+from .cache import ride_list_cache_key
+from .filters import RideFilter, RideOrderingFilter
 from .models import Ride, RideEvent
-from .serializers import RideSerializer
+from .serializers import (
+    RIDE_VALUE_FIELDS, RideSerializer, ride_rows_to_representation,
+)
+
+
+@lru_cache(maxsize=1)
+def _todays_threshold(tick):
+    """
+    Return the 'today's' events threshold for a whole-second `tick`.
+
+    The 24h window does not care about sub-second drift, so every request
+    within the same second shares one datetime (and identical SQL params).
+    """
+    return datetime.fromtimestamp(tick, tz=dt_timezone.utc) - timedelta(hours=24)
 
 
 class IsAdminRole(BasePermission):
     """Only allow access to users whose role is 'admin'."""
 
     def has_permission(self, request, view):
+        # Authenticated users are always AUTH_USER_MODEL instances, so
+        # `role` can be read directly once anonymous users are excluded.
         user = request.user
-        return bool(
-            user
-            and user.is_authenticated
-            and getattr(user, 'role', None) == 'admin'
-        )
+        return bool(user and user.is_authenticated and user.role == 'admin')
+
+
+class RideCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the primary key by default.
+
+    Avoids the `COUNT(*)` query of page number pagination and stays stable
+    while new rides are inserted. `?ordering=` from `OrderingFilter` is
+    still honoured. `id_ride` is appended as a tiebreak and the cursor
+    position covers every ordering field, so positions are unique and
+    rides sharing a pickup time (or distance) are neither skipped nor
+    repeated. Ordering stays on the raw columns so their indexes are used;
+    NULL `pickup_time`s keep the database's native NULL placement and the
+    position filter accounts for it.
+
+    DRF's `paginate_queryset` only filters on the first ordering field, so
+    the full position is applied here and DRF is handed a position-less
+    cursor. The flags restored afterwards mirror
+    `CursorPagination.paginate_queryset` in djangorestframework 3.14-3.18,
+    which is why requirements.txt caps the version below 3.19.
+    """
+
+    ordering = 'id_ride'
+    position_separator = '|'
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(super().get_ordering(request, queryset, view))
+        if ordering[-1].lstrip('-') != 'id_ride':
+            # Tiebreak in the same direction as the primary ordering, so
+            # the row order is a plain tuple comparison on all fields.
+            prefix = '-' if ordering[0].startswith('-') else ''
+            ordering.append(prefix + 'id_ride')
+        return tuple(ordering)
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            name = field.lstrip('-')
+            if isinstance(instance, dict):
+                value = instance[name]
+            else:
+                value = getattr(instance, name)
+            # NULL is encoded as an empty string.
+            values.append('' if value is None else str(value))
+        return self.position_separator.join(values)
+
+    def decode_cursor(self, request):
+        # Deliberately position-less: DRF would otherwise filter on the first
+        # ordering field only. Only `paginate_queryset` sees the real
+        # position, via `super().decode_cursor()`; keep both in step.
+        # Offset/reverse are used by DRF as is.
+        cursor = super().decode_cursor(request)
+        if cursor is None or cursor.position is None:
+            return cursor
+        return cursor._replace(position=None)
+
+    def _after_position(self, queryset, ordering, position, reverse):
+        """
+        Return a Q matching rows strictly after `position` in the paging
+        direction, i.e. a tuple comparison across all ordering fields.
+        """
+        values = position.split(self.position_separator)
+        if len(values) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+        nulls_largest = connections[queryset.db].features.nulls_order_largest
+
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, values):
+            name = field.lstrip('-')
+            ascending = reverse == field.startswith('-')
+            nulls_first = nulls_largest != ascending
+            if value == '':
+                # After NULL: every non-NULL value if NULLs come first,
+                # otherwise nothing (the tiebreak decides among NULLs).
+                after = (
+                    Q(**{f'{name}__isnull': False}) if nulls_first
+                    else Q(pk__in=[])
+                )
+                equal_here = Q(**{f'{name}__isnull': True})
+            else:
+                lookup = 'gt' if ascending else 'lt'
+                after = Q(**{f'{name}__{lookup}': value})
+                if not nulls_first:
+                    after |= Q(**{f'{name}__isnull': True})
+                equal_here = Q(**{name: value})
+            condition |= equal & after
+            equal &= equal_here
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        cursor = super().decode_cursor(request)
+        position = None if cursor is None else cursor.position
+        if position is not None:
+            ordering = self.get_ordering(request, queryset, view)
+            try:
+                queryset = queryset.filter(self._after_position(
+                    queryset, ordering, position, cursor.reverse,
+                ))
+            except (ValueError, DjangoValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        page = super().paginate_queryset(queryset, request, view)
+
+        if position is not None:
+            # What DRF does when the cursor carries a position.
+            if self.cursor.reverse:
+                self.has_next = True
+                self.next_position = position
+            else:
+                self.has_previous = True
+                self.previous_position = position
+            if self.template is not None:
+                self.display_page_controls = True
+        return page
 
 
 class RideViewSet(viewsets.ModelViewSet):
@@ -33,97 +171,177 @@ class RideViewSet(viewsets.ModelViewSet):
     - Filtering by `status` and `rider__email`
     - Ordering by `pickup_time` and `distance`
       (distance requires `lat` and `lng` query params)
-    - Pagination (page number based, default page size 20)
-    - Efficient prefetching of today's ride events (last 24h)
+    - Pagination (cursor based, default page size 20)
+    - Fetching today's ride events (last 24h) in one query per page
     """
 
     serializer_class = RideSerializer
     permission_classes = [IsAdminRole]
-    filter_backends = [DjangoFilterBackend, OrderingFilter]
-    filterset_fields = ['status', 'rider__email']
+    pagination_class = RideCursorPagination
+    filter_backends = [DjangoFilterBackend, RideOrderingFilter]
+    filterset_class = RideFilter
     ordering_fields = ['pickup_time', 'distance']
+    unpaginated_chunk_size = 200
+    list_cache_timeout = 10
+
+    @cached_property
+    def todays_threshold(self):
+        """
+        The datetime threshold for 'today's' events (last 24h).
+
+        Computed once per view instance, i.e. per request, so the event
+        lookups and the serializer fallback agree on the same "now".
+        """
+        return _todays_threshold(int(time.time()))
+
+    @cached_property
+    def distance_origin(self):
+        """
+        The `lat`/`lng` query params parsed into a `(lat, lng)` float pair.
+
+        None when they are missing or not numeric (or there is no request,
+        e.g. during schema generation), unless distance ordering was
+        requested on the list action, in which case a 400 is raised. Other
+        actions never sort, so they ignore `ordering`.
+        """
+        request = self.request
+        if request is None:
+            return None
+        lat = request.query_params.get('lat')
+        lng = request.query_params.get('lng')
+        wants_distance = (
+            self.action == 'list'
+            and 'distance' in request.query_params.get('ordering', '')
+        )
+        if lat is None or lng is None:
+            if wants_distance:
+                raise ValidationError({
+                    'error': (
+                        'Sorting by distance requires both "lat" and "lng" '
+                        'query parameters.'
+                    )
+                })
+            return None
+        try:
+            origin = float(lat), float(lng)
+        except ValueError:
+            origin = None
+        # `float()` also accepts "nan"/"inf", which would make every distance
+        # NULL/NaN and leave nothing to order or paginate on.
+        if origin is None or not all(map(math.isfinite, origin)):
+            if wants_distance:
+                raise ValidationError(
+                    {'error': '"lat" and "lng" must be valid numeric values.'}
+                )
+            return None
+        return origin
 
-    def _get_todays_threshold(self):
-        """Return the datetime threshold for 'today's' events (last 24h)."""
-        return timezone.now() - timedelta(hours=24)
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['todays_threshold'] = self.todays_threshold
+        return context
 
     def get_queryset(self):
-        qs = Ride.objects.select_related('rider', 'driver')
-
-        # Prefetch only ride events from the last 24 hours to avoid
-        # scanning the full (potentially very large) RideEvent table.
-        threshold = self._get_todays_threshold()
-        recent_events_qs = RideEvent.objects.filter(
-            created_at__gte=threshold,
-        ).only('id_ride_event', 'description', 'created_at', 'ride_id')
-
-        qs = qs.prefetch_related(
-            Prefetch(
-                'ride_events',
-                queryset=recent_events_qs,
-                to_attr='todays_ride_events',
-            )
+        # Only load the columns the serializer renders, for both the ride
+        # and the joined rider/driver rows.
+        qs = Ride.objects.select_related('rider', 'driver').only(
+            *RIDE_VALUE_FIELDS,
+        ).annotate(
+            # EXISTS stops at the first matching row of the composite
+            # (ride, created_at) index, letting rides without recent events
+            # skip the event lookup entirely.
+            has_recent_events=Exists(RideEvent.objects.filter(
+                ride_id=OuterRef('pk'),
+                created_at__gte=self.todays_threshold,
+            )),
         )
 
         # Annotate with approximate planar distance when lat/lng provided.
         # This allows efficient DB-level sorting by distance with pagination.
-        lat = self.request.query_params.get('lat')
-        lng = self.request.query_params.get('lng')
-        if lat is not None and lng is not None:
-            try:
-                lat_f = float(lat)
-                lng_f = float(lng)
-            except (ValueError, TypeError):
-                pass
-            else:
-                lat_diff = ExpressionWrapper(
-                    (F('pickup_latitude') - lat_f) * (F('pickup_latitude') - lat_f),
-                    output_field=FloatField(),
-                )
-                lng_diff = ExpressionWrapper(
-                    (F('pickup_longitude') - lng_f) * (F('pickup_longitude') - lng_f),
-                    output_field=FloatField(),
-                )
-                qs = qs.annotate(distance=lat_diff + lng_diff)
+        if self.distance_origin is not None:
+            lat, lng = self.distance_origin
+            lat_diff = F('pickup_latitude') - lat
+            lng_diff = F('pickup_longitude') - lng
+            qs = qs.annotate(
+                distance=lat_diff * lat_diff + lng_diff * lng_diff,
+            )
 
         return qs.order_by('id_ride')
 
+    def _attach_todays_ride_events(self, rides):
+        """
+        Fetch ride events from the last 24 hours for the `rides` value rows
+        in a single query and attach them as `todays_ride_events`.
+
+        Only rides annotated with `has_recent_events` are looked up, so a
+        page without any recent events issues no query at all. Rows are
+        fetched with `.values()` and grouped by ride in Python,
+        which avoids building a RideEvent instance per event. Ordering by
+        `(ride, -created_at)` matches the composite index, so each ride's
+        events come back newest first straight from an index scan.
+        """
+        rides = list(rides)
+        buckets = defaultdict(list)
+        rows = RideEvent.objects.filter(
+            ride_id__in=[
+                ride['id_ride'] for ride in rides if ride['has_recent_events']
+            ],
+            created_at__gte=self.todays_threshold,
+        ).order_by('ride_id', '-created_at').values(
+            'id_ride_event', 'description', 'created_at', 'ride_id',
+        )
+        for row in rows.iterator():
+            buckets[row['ride_id']].append(row)
+        for ride in rides:
+            ride['todays_ride_events'] = buckets[ride['id_ride']]
+        return rides
+
     def list(self, request, *args, **kwargs):
-        # Validate: if ordering=distance is requested, lat/lng must be present
-        ordering = request.query_params.get('ordering', '')
-        if 'distance' in ordering:
-            lat = request.query_params.get('lat')
-            lng = request.query_params.get('lng')
-            if lat is None or lng is None:
-                return Response(
-                    {
-                        'error': (
-                            'Sorting by distance requires both "lat" and "lng" '
-                            'query parameters.'
-                        )
-                    },
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-            try:
-                float(lat)
-                float(lng)
-            except (ValueError, TypeError):
-                return Response(
-                    {'error': '"lat" and "lng" must be valid numeric values.'},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
+        # Dashboards poll identical list URLs, so JSON responses are cached
+        # briefly; writes to rides/events rotate the cache generation.
+        # The browsable API (HTML) is never cached.
+        if request.accepted_renderer.format != 'json':
+            return self._list_response()
+
+        cache_key = ride_list_cache_key(request)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+
+        def store(response):
+            cache.set(
+                cache_key,
+                (response.content, response['Content-Type']),
+                self.list_cache_timeout,
+            )
+
+        response = self._list_response()
+        response.add_post_render_callback(store)
+        return response
 
-        queryset = self.filter_queryset(self.get_queryset())
-        threshold = self._get_todays_threshold()
+    def _list_response(self):
+        # Rides are read as flat value rows (rider/driver columns included)
+        # and rendered directly, so no Ride/User instances are built.
+        fields = [*RIDE_VALUE_FIELDS, 'has_recent_events']
+        if self.distance_origin is not None:
+            fields.append('distance')
+        queryset = self.filter_queryset(self.get_queryset()).values(*fields)
 
         page = self.paginate_queryset(queryset)
         if page is not None:
-            serializer = self.get_serializer(
-                page, many=True, context={'todays_threshold': threshold},
+            page = self._attach_todays_ride_events(page)
+            return self.get_paginated_response(
+                ride_rows_to_representation(page),
             )
-            return self.get_paginated_response(serializer.data)
 
-        serializer = self.get_serializer(
-            queryset, many=True, context={'todays_threshold': threshold},
-        )
-        return Response(serializer.data)
\ No newline at end of file
+        # Unpaginated: read rides from the database in chunks and render each
+        # chunk as it arrives, so raw ride and event rows are only held one
+        # chunk at a time and each event query's IN list stays bounded.
+        # The rendered list itself still grows with the number of rides.
+        data = []
+        rows = queryset.iterator(chunk_size=self.unpaginated_chunk_size)
+        while chunk := list(islice(rows, self.unpaginated_chunk_size)):
+            chunk = self._attach_todays_ride_events(chunk)
+            data.extend(ride_rows_to_representation(chunk))
+        return Response(data)